@@ -52,6 +52,17 @@ def arg_deploy(parser, action):
         '-nr', dest='no_rollback', required=False, help='Do not rollback', action='store_true')
     optional_group.add_argument('-p', dest='parameters', required=False,
                                 help='Local parameters JSON file', default='parameters.json')
+    optional_group.add_argument(
+        '-nw', '--no-wait', dest='no_wait', required=False, action='store_true',
+        help='Return after executing the changeset and print a wait token')
+    optional_group.add_argument(
+        '-w', dest='token_file', required=False, help='File to save the wait token to')
+    optional_group.add_argument(
+        '-ff', '--fail-fast', dest='fail_fast', required=False, action='store_true',
+        help='Stop waiting at the first failed resource and print a wait token')
+    optional_group.add_argument(
+        '-cu', '--cancel-update', dest='cancel_update', required=False, action='store_true',
+        help='Cancel the stack update on failure (with --fail-fast)')
     command_deploy.set_defaults(func=action)
     return parser
 
@@ -72,10 +83,67 @@ def arg_lambda(parser, action):
         '-o', dest='output', required=False, help='Destination of the archive file')
     optional_group.add_argument(
         '-b', dest='bucket', required=False, help='Bucket to upload archive to')
+    optional_group.add_argument(
+        '-i', dest='ignore', required=False,
+        help='Ignore file with gitignore patterns (default SOURCE/.cfnctlignore)')
+    optional_group.add_argument(
+        '-st', '--strip', dest='strip', required=False, action='store_true',
+        help='Leave compiled python, markdown and top level doc folders out of the archive')
 
     command_lambda.set_defaults(func=action)
     return parser
 
+def arg_wait(parser, action):
+    '''
+    Wait subcommand and arguments
+    '''
+    command_wait = parser.add_parser(
+        'wait', help='resumes waiting on stacks deployed with --no-wait')
+    required_group = command_wait.add_argument_group('required arguments')
+    required_group.add_argument(
+        'tokens', nargs='+', metavar='TOKEN', help='Wait token or file containing one')
+    optional_group = command_wait.add_argument_group('optional arguments')
+    optional_group.add_argument(
+        '-ff', '--fail-fast', dest='fail_fast', required=False, action='store_true',
+        help='Stop waiting on a stack at its first failed resource')
+    optional_group.add_argument(
+        '-cu', '--cancel-update', dest='cancel_update', required=False, action='store_true',
+        help='Cancel the stack update on failure (with --fail-fast)')
+
+    command_wait.set_defaults(func=action)
+    return parser
+
+def arg_history(parser, action):
+    '''
+    History subcommand and arguments
+    '''
+    command_history = parser.add_parser(
+        'history', help='shows past runs and flags ones that got slower')
+    optional_group = command_history.add_argument_group('optional arguments')
+    optional_group.add_argument(
+        '-s', dest='name', required=False, help='Stack name or absolute lambda source path')
+    optional_group.add_argument(
+        '-n', dest='limit', required=False, type=int, default=20,
+        help='Number of runs to show')
+    optional_group.add_argument(
+        '-w', dest='window', required=False, type=int, default=5,
+        help='Number of earlier runs to compare the latest run with')
+    optional_group.add_argument(
+        '-x', dest='threshold', required=False, type=float, default=1.5,
+        help='Flag runs this many times slower than the earlier average')
+
+    command_history.set_defaults(func=action)
+    return parser
+
+def check_args(parser, args):
+    '''
+    Reject option combinations that would be silently ignored
+    '''
+    if getattr(args, 'token_file', None) and not (args.no_wait or args.fail_fast):
+        parser.error('-w requires --no-wait or --fail-fast')
+    if getattr(args, 'cancel_update', None) and not args.fail_fast:
+        parser.error('--cancel-update requires --fail-fast')
+
 def arg_parser():
     '''
     Create an argparse object with global arguments and return
@@ -101,7 +169,10 @@ def main():
     subparsers = parser.add_subparsers()
     arg_deploy(subparsers, commands.deploy)
     arg_lambda(subparsers, commands.lambda_command)
+    arg_wait(subparsers, commands.wait)
+    arg_history(subparsers, commands.history)
     args = parser.parse_args()
+    check_args(parser, args)
     args.func(args)
 
 
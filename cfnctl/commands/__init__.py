@@ -3,3 +3,5 @@ CFNCTL subcommand logic
 '''
 from cfnctl.commands.deploy import deploy
 from cfnctl.commands.lambda_command import lambda_command
+from cfnctl.commands.wait import wait
+from cfnctl.commands.history import history
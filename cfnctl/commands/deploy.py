@@ -15,6 +15,21 @@ import boto3
 import botocore.exceptions
 from jinja2 import Environment, FileSystemLoader
 import cfnctl.lib as lib
+import cfnctl.journal as journal
+
+# finished states that mean the change set was applied
+SUCCESS_STATES = [
+    'CREATE_COMPLETE',
+    'UPDATE_COMPLETE'
+]
+
+# resource states that fail a rollout. DELETE_FAILED is left out since
+# it happens during cleanup of replaced resources without failing the update
+FAILURE_STATES = [
+    'CREATE_FAILED',
+    'UPDATE_FAILED',
+    'IMPORT_FAILED'
+]
 
 def _stack_exists(client, name):
     '''Check if a cfn stack exists
@@ -114,36 +129,76 @@ def _stack_complete(client, name):
     }
 
 
-def _wait_for_stack(client, stack, token=None, old_events=None):
-    '''Block script execution until the stack status
-    is in a finished state
+def _root_cause(events):
+    '''Find the earliest failed resource event. Resources
+    cancelled because of another failure are only reported
+    if nothing else failed
+
+    events {list} stack events, oldest first
+    return dict or None
+    '''
+    failed = [event for event in events if event['ResourceStatus'] in FAILURE_STATES]
+    causes = [
+        event for event in failed
+        if 'cancelled' not in event.get('ResourceStatusReason', '').lower()
+    ]
+    if causes:
+        return causes[0]
+    return failed and failed[0] or None
+
+
+def _cancel_update(client, stack):
+    '''Cancel an in progress stack update so it starts
+    rolling back immediately
 
     return bool
     '''
-    events = None
-    if token:
-        events = client.describe_stack_events(
-            StackName=stack,
-            NextToken=token
-        )
-    else:
-        events = client.describe_stack_events(
-            StackName=stack
-        )
-    if not old_events:
-        old_events = []
-    # determine which events are new
-    new_events = list(
-        [event for event in events['StackEvents'] if event['EventId'] not in old_events]
+    logging.info('Cancelling update of %s', stack)
+    try:
+        client.cancel_update_stack(StackName=stack)
+    except botocore.exceptions.ClientError as error:
+        message = error.response.get('Error', {}).get('Message', 'Unknown')
+        logging.error('Unable to cancel update: %s', message)
+        return False
+    return True
+
+
+def _report_failure(client, stack, event, cancel=False):
+    '''Log the root cause of a failed stack and optionally
+    cancel the update
+    '''
+    logging.error(
+        'Stack %s failed: %s %s %s',
+        stack,
+        event['LogicalResourceId'],
+        event['ResourceStatus'],
+        'ResourceStatusReason' in event and event['ResourceStatusReason'] or ''
     )
+    if cancel:
+        _cancel_update(client, stack)
+
+
+def _wait_for_stack(client, stack, event_id=None, fail_fast=False):
+    '''Block script execution until the stack status
+    is in a finished state, logging the events after
+    event_id. With fail_fast stop at the first failed
+    resource instead
+
+    return the failed event if stopped early, else None
+    '''
+    new_events = _events_since(client, stack, event_id)
     # log new events
-    for _, event in enumerate(new_events):
+    for event in new_events:
         logging.info(
             '%s %s %s',
             event['LogicalResourceId'],
             event['ResourceStatus'],
             'ResourceStatusReason' in event and event['ResourceStatusReason'] or ''
         )
+        event_id = event['EventId']
+    failure = fail_fast and _root_cause(new_events)
+    if failure:
+        return failure
     # wait a bit before doing this again
     time.sleep(3)
     # if the stack is complete we'll stop (we should query one more time for events probably)
@@ -151,14 +206,75 @@ def _wait_for_stack(client, stack, token=None, old_events=None):
     if stack_status['complete']:
         logging.info('Stack finished in %s state', stack_status['status'])
         return None
-    # make a list of previous stack events
-    last_events = list([event['EventId'] for event in events['StackEvents']])
-    return _wait_for_stack(
-        client,
-        stack,
-        'NextToken' in events and events['NextToken'],
-        last_events
-    )
+    return _wait_for_stack(client, stack, event_id, fail_fast)
+
+
+def _last_event_id(client, stack):
+    '''Get the id of the most recent stack event
+
+    return string or None
+    '''
+    events = client.describe_stack_events(StackName=stack)
+    if not events['StackEvents']:
+        return None
+    return events['StackEvents'][0]['EventId']
+
+
+def _events_since(client, stack, event_id=None):
+    '''Get the stack events that happened after event_id,
+    paging back through the event history until it is found.
+    Without event_id only the most recent page is returned
+
+    return list, oldest event first
+    '''
+    new_events = []
+    token = None
+    while True:
+        if token:
+            events = client.describe_stack_events(
+                StackName=stack,
+                NextToken=token
+            )
+        else:
+            events = client.describe_stack_events(
+                StackName=stack
+            )
+        for event in events['StackEvents']:
+            if event_id and event['EventId'] == event_id:
+                return list(reversed(new_events))
+            new_events.append(event)
+        token = event_id and events.get('NextToken')
+        if not token:
+            return list(reversed(new_events))
+
+
+def _make_wait_token(stack, changeset, event_id, region=None, started=None, account=None):
+    '''Create a state token that `cfnctl wait` can resume from.
+    With started `cfnctl wait` journals the final status of the deploy
+
+    return dict
+    '''
+    token = {
+        'stack': stack,
+        'changeset': changeset,
+        'event_id': event_id,
+        'region': region
+    }
+    if started:
+        token['started'] = started
+        token['account'] = account
+    return token
+
+
+def _write_wait_token(token, token_file=None):
+    '''Print a wait token and optionally save it to a file
+    '''
+    rendered = json.dumps(token)
+    if token_file:
+        with open(token_file, 'w') as handle:
+            handle.write(rendered)
+        logging.info('Wrote wait token to %s', token_file)
+    print(rendered)
 
 
 def _execute_changeset(client, changeset, stack):
@@ -196,22 +312,63 @@ def deploy(args):
     '''Deploy a cloudformation stack
     '''
     logging.info('Calling deploy')
+    started = time.time()
     stack = args.stack_name
-    client = boto3.client('cloudformation')
+    region = args.region or boto3.session.Session().region_name
+    client = boto3.client('cloudformation', region_name=region)
     simple_storage_service = boto3.client('s3')
     account_id = boto3.client('sts').get_caller_identity().get('Account')
-    region = args.region or boto3.session.Session().region_name
     bucket = args.bucket or lib.bucket.maybe_make_bucket(simple_storage_service, region, account_id)
     lib.bucket.upload_file(simple_storage_service, stack, bucket, args.template)
+    parameters = _get_parameters(args.parameters)
     changeset = _make_change_set(
         client,
         stack,
         lib.bucket.get_file_url(bucket, stack, args.template),
-        _get_parameters(args.parameters)
+        parameters
     )
+    run = {
+        'command': 'deploy',
+        'name': stack,
+        'started': started,
+        'account': account_id,
+        'region': region,
+        'changeset': changeset,
+        'template_hash': journal.hash_file(args.template),
+        # parameter values often hold secrets, only keep the keys
+        'details': {
+            'parameters': [parameter['ParameterKey'] for parameter in parameters],
+            'parameters_hash': journal.hash_value(parameters)
+        }
+    }
     ready = _wait_for_changeset(client, changeset, stack)
     if ready is False:
+        journal.record(status='CHANGESET_FAILED', **run)
+        return
+
+    if args.no_wait:
+        token = _make_wait_token(
+            stack, changeset, _last_event_id(client, stack), region, started, account_id
+        )
+        _execute_changeset(client, changeset, stack)
+        journal.record(status='DETACHED', **run)
+        logging.info('Not waiting for stack, resume with `cfnctl wait`')
+        _write_wait_token(token, args.token_file)
         return
 
+    # only events from this execution are followed and classified
+    event_id = _last_event_id(client, stack)
     _execute_changeset(client, changeset, stack)
-    _wait_for_stack(client, stack)
+    # lets a crashed run find the change set it was executing
+    journal.record(status='EXECUTING', **run)
+    failure = _wait_for_stack(client, stack, event_id, args.fail_fast)
+    if failure:
+        journal.record(status=failure['ResourceStatus'], **run)
+        _report_failure(client, stack, failure, args.cancel_update)
+        # hand the rollback off to `cfnctl wait`, starting at the failure
+        _write_wait_token(
+            _make_wait_token(stack, changeset, failure['EventId'], region),
+            args.token_file
+        )
+        sys.exit(1)
+    journal.record(status=_stack_complete(client, stack)['status'], **run)
@@ -0,0 +1,40 @@
+'''
+History subcommand logic
+Lists past deploy and lambda runs from the local journal
+and flags targets whose latest run took much longer than usual
+'''
+import datetime
+import logging
+import cfnctl.journal as journal
+
+def _format_run(entry):
+    '''Render a journal entry as a single line
+
+    return string
+    '''
+    return '{0} {1:<7} {2} {3} {4} {5:.0f}s'.format(
+        datetime.datetime.fromtimestamp(entry['started']).strftime('%Y-%m-%d %H:%M:%S'),
+        entry['command'],
+        entry['name'],
+        entry['region'] or '-',
+        entry['status'],
+        entry['duration']
+    )
+
+
+def history(args):
+    '''Show deploy history and duration regressions
+    '''
+    logging.info('Calling history')
+    entries = journal.runs(name=args.name, region=args.region)
+    for entry in entries[:args.limit]:
+        print(_format_run(entry))
+    for regression in journal.regressions(entries, args.window, args.threshold):
+        logging.warning(
+            '%s %s took %.0fs, %.1fx its %.0fs average',
+            regression['entry']['command'],
+            regression['entry']['name'],
+            regression['seconds'],
+            regression['seconds'] / regression['baseline'],
+            regression['baseline']
+        )
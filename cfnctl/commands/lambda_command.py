@@ -7,39 +7,194 @@ stack or update an existing stack
 '''
 import logging
 import os
+import re
+import time
 import zipfile
 import boto3
 import cfnctl.lib.bucket as bucket
+import cfnctl.journal as journal
 
-def write_zip(path, ziph):
+IGNORE_FILE = '.cfnctlignore'
+
+# always left out of archives
+DEFAULT_IGNORE = [
+    '.git/',
+    '/' + IGNORE_FILE
+]
+
+# left out of archives with --strip. Doc folders are anchored to the
+# source root since vendored packages such as botocore import their docs
+STRIP_IGNORE = [
+    '__pycache__/',
+    '*.py[cod]',
+    '*.md',
+    '*.rst',
+    '/doc/',
+    '/docs/'
+]
+
+def _translate_pattern(pattern):
+    '''
+    Translate a gitignore glob into a regular expression
+    pattern {string} glob without negation or leading/trailing slashes
+    '''
+    regex = ''
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            regex += '(?:.*/)?'
+            index += 3
+            continue
+        if pattern.startswith('**', index):
+            regex += '.*'
+            index += 2
+            continue
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[' and pattern.find(']', index + 2) != -1:
+            end = pattern.find(']', index + 2)
+            group = pattern[index + 1:end].replace('\\', '\\\\')
+            if group.startswith('!'):
+                group = '^' + group[1:]
+            regex += '[' + group + ']'
+            index = end
+        elif char == '\\' and index + 1 < len(pattern):
+            index += 1
+            regex += re.escape(pattern[index])
+        else:
+            regex += re.escape(char)
+        index += 1
+    return regex
+
+def compile_ignore(patterns):
+    '''
+    Compile gitignore style patterns into matching rules
+    patterns {list} lines of an ignore file
+    '''
+    rules = []
+    for pattern in patterns:
+        pattern = pattern.rstrip('\r\n').rstrip()
+        if not pattern or pattern.startswith('#'):
+            continue
+        negate = pattern.startswith('!')
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # a slash anywhere but the end anchors the pattern to the source root
+        anchored = '/' in pattern
+        regex = _translate_pattern(pattern.lstrip('/'))
+        if not anchored:
+            regex = '(?:.*/)?' + regex
+        rules.append((re.compile(regex + '$'), negate, dir_only))
+    return rules
+
+def load_ignore(path, strip=False):
+    '''
+    Load ignore rules for a source directory
+    path {string} ignore file, it is fine if it does not exist
+    strip {bool} also ignore compiled python and docs
+    '''
+    patterns = list(DEFAULT_IGNORE)
+    if strip:
+        patterns.extend(STRIP_IGNORE)
+    if os.path.isfile(path):
+        logging.info('using ignore file %s', path)
+        with open(path) as handle:
+            patterns.extend(handle.readlines())
+    return compile_ignore(patterns)
+
+def is_ignored(rules, path, is_dir=False):
+    '''
+    Check a path against ignore rules, the last matching rule wins
+    path {string} path relative to the source directory using / separators
+    '''
+    ignored = False
+    for regex, negate, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        if regex.match(path):
+            ignored = not negate
+    return ignored
+
+def walk_source(path, rules, stats):
+    '''
+    Walk a source directory yielding the absolute path of every file
+    to archive. Ignored directories are pruned without descending
+    path {string} absolute path to directory to walk
+    rules {list} rules from compile_ignore
+    stats {dict} counters updated with what was skipped
+    '''
+    for root, dirs, files in os.walk(path):
+        relroot = os.path.relpath(root, path)
+        relroot = '' if relroot == '.' else relroot.replace(os.sep, '/') + '/'
+        kept = []
+        for dirname in sorted(dirs):
+            if is_ignored(rules, relroot + dirname, True):
+                stats['skipped_dirs'] += 1
+            else:
+                kept.append(dirname)
+        dirs[:] = kept
+        for filename in sorted(files):
+            abspath = os.path.join(root, filename)
+            if is_ignored(rules, relroot + filename):
+                stats['skipped_files'] += 1
+                stats['skipped_bytes'] += os.path.getsize(abspath)
+                continue
+            yield abspath
+
+def write_zip(path, ziph, rules=None):
     '''
     Write files to a zip file
     path {string} absolute path to directory to zip
     ziph {ZipFile} ZipFile handle
+    rules {list} rules from compile_ignore, archives everything if None
     '''
+    stats = {
+        'files': 0,
+        'bytes': 0,
+        'skipped_files': 0,
+        'skipped_bytes': 0,
+        'skipped_dirs': 0
+    }
     basedir = os.path.dirname(path)
-    for root, _, files in os.walk(path):
-        for filename in files:
-            abspath = os.path.join(root, filename)
-            ziph.write(abspath, abspath.replace(basedir, ''))
+    for abspath in walk_source(path, rules or [], stats):
+        ziph.write(abspath, os.path.relpath(abspath, basedir))
+        stats['files'] += 1
+        stats['bytes'] += os.path.getsize(abspath)
+    return stats
 
-def zip_dir(path, name):
+def zip_dir(path, name, rules=None):
     '''
     Zip a directory
     path {string} absolute path to directory to zip
     name {string} absolute path to archive directory location/name
+    rules {list} rules from compile_ignore
     '''
     if not name.endswith('.zip'):
         name = ''.join([name, '.zip'])
     logging.info('writing contents of %s to archive %s', path, name)
     zipf = zipfile.ZipFile(name, 'w', zipfile.ZIP_DEFLATED)
-    write_zip(path, zipf)
+    stats = write_zip(path, zipf, rules)
     zipf.close()
+    logging.info(
+        'archived %d files (%d bytes), skipped %d files (%d bytes) and %d directories',
+        stats['files'],
+        stats['bytes'],
+        stats['skipped_files'],
+        stats['skipped_bytes'],
+        stats['skipped_dirs']
+    )
+    return stats
 
 def lambda_command(args):
     '''Deploy a lambda function
     '''
     logging.info('Calling lambda_command')
+    started = time.time()
     simple_storage_service = boto3.client('s3')
     account_id = boto3.client('sts').get_caller_identity().get('Account')
     region = args.region or boto3.session.Session().region_name
@@ -50,8 +205,21 @@ def lambda_command(args):
     )
     outfile = os.path.abspath(args.output or ''.join([args.source, '.zip']))
     source = os.path.abspath(args.source)
-    zip_dir(source, outfile)
+    rules = load_ignore(args.ignore or os.path.join(source, IGNORE_FILE), args.strip)
+    packaging = time.time()
+    stats = zip_dir(source, outfile, rules)
+    stats['package_seconds'] = time.time() - packaging
     bucket.upload_file(simple_storage_service, 'lambda', bucket_name, outfile)
     logging.info('Finished uploading archive')
     file_url = bucket.get_file_url(bucket_name, 'lambda', os.path.basename(outfile))
     logging.info(file_url)
+    # folder names like src are shared by unrelated projects
+    journal.record(
+        'lambda',
+        source,
+        'UPLOADED',
+        started,
+        account=account_id,
+        region=region,
+        details=stats
+    )
@@ -0,0 +1,138 @@
+'''
+Wait subcommand logic
+Resumes tailing stack events from the state tokens written
+by `cfnctl deploy --no-wait` until every stack reaches a
+finished state
+'''
+import json
+import logging
+import os
+import sys
+import time
+import boto3
+import botocore.exceptions
+import cfnctl.journal as journal
+from cfnctl.commands.deploy import (
+    SUCCESS_STATES, _events_since, _stack_complete, _root_cause, _report_failure
+)
+
+def _read_wait_token(value):
+    '''Load a wait token from a file path or a JSON string
+
+    return dict
+    '''
+    if os.path.isfile(value):
+        with open(value) as handle:
+            value = handle.read()
+    try:
+        token = json.loads(value)
+    except ValueError:
+        raise ValueError('Invalid wait token: {0}'.format(value))
+    if not isinstance(token, dict) or 'stack' not in token:
+        raise ValueError('Invalid wait token: {0}'.format(value))
+    return token
+
+
+def _poll_stack(client, token):
+    '''Log the stack events that happened since the token was
+    last polled and move the token forward
+
+    return _stack_complete with the root cause of any new failure
+    '''
+    stack = token['stack']
+    events = _events_since(client, stack, token.get('event_id'))
+    for event in events:
+        logging.info(
+            '%s %s %s %s',
+            stack,
+            event['LogicalResourceId'],
+            event['ResourceStatus'],
+            'ResourceStatusReason' in event and event['ResourceStatusReason'] or ''
+        )
+        token['event_id'] = event['EventId']
+    stack_status = _stack_complete(client, stack)
+    stack_status['failure'] = _root_cause(events)
+    return stack_status
+
+
+def _record_finish(token, status):
+    '''Journal the final status of a deploy started with --no-wait
+    '''
+    if not token.get('started'):
+        return
+    journal.record(
+        'deploy',
+        token['stack'],
+        status,
+        token['started'],
+        account=token.get('account'),
+        region=token.get('region'),
+        changeset=token.get('changeset')
+    )
+
+
+def wait_for_tokens(tokens, get_client, fail_fast=False, cancel_update=False):
+    '''Block script execution until every stack in tokens
+    is in a finished state, polling all of them in turn.
+    With fail_fast a stack is done at its first failed resource.
+    A stack that cannot be described is marked ERROR and dropped
+
+    return dict of (region, stack name) to final status
+    '''
+    statuses = {}
+    pending = list(tokens)
+    while pending:
+        for token in list(pending):
+            stack = token['stack']
+            region = token.get('region')
+            client = get_client(region)
+            try:
+                stack_status = _poll_stack(client, token)
+            except botocore.exceptions.ClientError as error:
+                message = error.response.get('Error', {}).get('Message', 'Unknown')
+                logging.error('Unable to wait for stack %s in %s: %s', stack, region, message)
+                statuses[(region, stack)] = 'ERROR'
+                _record_finish(token, 'ERROR')
+                pending.remove(token)
+                continue
+            if fail_fast and stack_status['failure']:
+                _report_failure(client, stack, stack_status['failure'], cancel_update)
+                statuses[(region, stack)] = stack_status['failure']['ResourceStatus']
+                _record_finish(token, stack_status['failure']['ResourceStatus'])
+                pending.remove(token)
+            elif stack_status['complete']:
+                logging.info(
+                    'Stack %s in %s finished in %s state', stack, region, stack_status['status']
+                )
+                statuses[(region, stack)] = stack_status['status']
+                _record_finish(token, stack_status['status'])
+                pending.remove(token)
+        if pending:
+            time.sleep(3)
+    return statuses
+
+
+def wait(args):
+    '''Wait for stacks deployed with --no-wait, exits
+    non-zero if any stack did not finish successfully
+    '''
+    logging.info('Calling wait')
+    tokens = [_read_wait_token(value) for value in args.tokens]
+    for token in tokens:
+        token['region'] = token.get('region') or args.region
+    clients = {}
+
+    def get_client(region):
+        if region not in clients:
+            clients[region] = boto3.client('cloudformation', region_name=region)
+        return clients[region]
+
+    statuses = wait_for_tokens(tokens, get_client, args.fail_fast, args.cancel_update)
+    failed = sorted(
+        '{0} in {1}'.format(stack, region)
+        for (region, stack), status in statuses.items() if status not in SUCCESS_STATES
+    )
+    if failed:
+        logging.error('Stacks did not finish successfully: %s', ', '.join(failed))
+        sys.exit(1)
+    return statuses
@@ -0,0 +1,174 @@
+'''
+Local deployment journal
+Append-only SQLite record of every deploy and lambda run,
+indexed by name, account and region
+'''
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+DEFAULT_PATH = os.path.join('~', '.cfnctl', 'journal.db')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    name TEXT NOT NULL,
+    account TEXT,
+    region TEXT,
+    changeset TEXT,
+    template_hash TEXT,
+    details TEXT,
+    status TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_target ON runs (name, account, region, command);
+'''
+
+# statuses of runs that finished successfully
+SUCCESS_STATES = [
+    'CREATE_COMPLETE',
+    'UPDATE_COMPLETE',
+    'UPLOADED'
+]
+
+COLUMNS = [
+    'id', 'command', 'name', 'account', 'region', 'changeset',
+    'template_hash', 'details', 'status', 'started', 'duration'
+]
+
+def journal_path():
+    '''Location of the journal, CFNCTL_JOURNAL overrides the default
+
+    return string
+    '''
+    return os.path.expanduser(os.environ.get('CFNCTL_JOURNAL', DEFAULT_PATH))
+
+
+def connect(path=None):
+    '''Open the journal, creating it if needed
+
+    return sqlite3.Connection
+    '''
+    path = path or journal_path()
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def hash_file(path):
+    '''sha256 of a local file
+
+    return string or None if path is not a local file
+    '''
+    if not path or not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_value(value):
+    '''sha256 of a JSON serialisable value, so values that may
+    hold secrets can be compared without being stored
+
+    return string
+    '''
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def record(command, name, status, started, account=None, region=None,
+           changeset=None, template_hash=None, details=None, path=None):
+    '''Append a run to the journal, duration is measured from started.
+    The journal is best effort, a failed write only logs a warning
+    '''
+    try:
+        conn = connect(path)
+        try:
+            with conn:
+                conn.execute(
+                    'INSERT INTO runs (command, name, account, region, changeset, template_hash, '
+                    'details, status, started, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        command, name, account, region, changeset, template_hash,
+                        json.dumps(details, sort_keys=True) if details is not None else None,
+                        status, started, time.time() - started
+                    )
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError, IOError) as error:
+        logging.warning('Unable to write to journal: %s', error)
+
+
+def runs(name=None, account=None, region=None, command=None, limit=None, path=None):
+    '''Get journal entries, newest first
+
+    return list of dict
+    '''
+    clauses = []
+    values = []
+    for column, value in [
+            ('name', name), ('account', account), ('region', region), ('command', command)
+    ]:
+        if value:
+            clauses.append('{0} = ?'.format(column))
+            values.append(value)
+    query = 'SELECT {0} FROM runs'.format(', '.join(COLUMNS))
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += ' ORDER BY id DESC'
+    if limit:
+        query += ' LIMIT {0:d}'.format(limit)
+    conn = connect(path)
+    rows = conn.execute(query, values).fetchall()
+    conn.close()
+    return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def _seconds(entry):
+    '''Time a run is compared on, packaging time for lambda runs
+    and total duration for everything else
+
+    return float
+    '''
+    if entry['command'] == 'lambda' and entry['details']:
+        return json.loads(entry['details']).get('package_seconds', entry['duration'])
+    return entry['duration']
+
+
+def regressions(entries, window=5, threshold=1.5):
+    '''Find targets whose latest successful run took threshold times
+    longer than the average of the window successful runs before it
+
+    entries {list} runs, newest first
+    return list of dict with the latest entry, its compared seconds
+    and the baseline seconds
+    '''
+    grouped = {}
+    for entry in entries:
+        # failed, detached and unfinished runs stop early and would skew the baseline
+        if entry['status'] not in SUCCESS_STATES:
+            continue
+        key = (entry['command'], entry['name'], entry['account'], entry['region'])
+        grouped.setdefault(key, []).append(entry)
+    found = []
+    for key in sorted(grouped):
+        latest = grouped[key][0]
+        previous = grouped[key][1:window + 1]
+        if not previous:
+            continue
+        baseline = sum(_seconds(entry) for entry in previous) / len(previous)
+        seconds = _seconds(latest)
+        if seconds > baseline * threshold:
+            found.append({'entry': latest, 'seconds': seconds, 'baseline': baseline})
+    return found
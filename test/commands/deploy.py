@@ -3,7 +3,7 @@ import unittest
 import datetime
 import test.mocks.cloudformation as cfn
 from test.mocks.s3 import S3
-from cfnctl.commands.deploy import _wait_for_stack, _stack_exists, _make_change_set, _wait_for_changeset, _stack_complete, _execute_changeset, _get_parameters
+from cfnctl.commands.deploy import _wait_for_stack, _stack_exists, _make_change_set, _wait_for_changeset, _stack_complete, _execute_changeset, _get_parameters, _events_since, _last_event_id, _root_cause, _cancel_update
 
 class TestCommandDeploy(unittest.TestCase):
 
@@ -24,6 +24,78 @@ class TestCommandDeploy(unittest.TestCase):
         # we're only testing that this runs to completion
         self.assertEqual(True, True)
 
+    def test_wait_for_stack_fail_fast(self):
+        '''stop waiting at the first failed resource
+        '''
+        client = cfn.Cloudformation()
+        client.mock('describe_stack_events', cfn.make_failed_stack_events(client))
+        failure = _wait_for_stack(client, 'foo', 1, fail_fast=True)
+        self.assertEqual(client.called['describe_stack_events'], 1)
+        self.assertEqual(client.called['describe_stacks'], 0)
+        self.assertEqual(failure['LogicalResourceId'], 'Bucket')
+
+    def test_wait_for_stack_ignores_old_failures(self):
+        '''failures from before the last seen event do not stop the wait
+        '''
+        client = cfn.Cloudformation()
+        history = cfn.make_failed_stack_events(client)
+        def describe_stack_events(StackName, NextToken):
+            events = history(StackName, NextToken)
+            events['StackEvents'].insert(0, {
+                'LogicalResourceId': StackName,
+                'ResourceStatus': 'UPDATE_IN_PROGRESS',
+                'ResourceStatusReason': 'User Initiated',
+                'StackName': StackName,
+                'EventId': 5
+            })
+            return events
+        client.mock('describe_stack_events', describe_stack_events)
+        client.mock('describe_stacks', cfn.make_describe_stacks(client, 1, 'UPDATE_COMPLETE'))
+        failure = _wait_for_stack(client, 'foo', 4, fail_fast=True)
+        self.assertEqual(failure, None)
+        self.assertEqual(client.called['describe_stack_events'], 1)
+        self.assertEqual(client.called['describe_stacks'], 1)
+        self.assertEqual(client.called['cancel_update_stack'], 0)
+
+    def test_root_cause(self):
+        '''find the earliest failure that was not a cancellation
+        '''
+        client = cfn.Cloudformation()
+        events = cfn.make_failed_stack_events(client)('foo', None)['StackEvents']
+        events.reverse()
+        self.assertEqual(_root_cause(events)['EventId'], 3)
+        self.assertEqual(_root_cause([events[-1]])['EventId'], 4)
+        self.assertEqual(_root_cause(events[:2]), None)
+
+    def test_root_cause_ignores_cleanup(self):
+        '''failing to delete a replaced resource does not fail the update
+        '''
+        events = [
+            {
+                'LogicalResourceId': 'foo',
+                'ResourceStatus': 'UPDATE_COMPLETE_CLEANUP_IN_PROGRESS',
+                'EventId': 5
+            },
+            {
+                'LogicalResourceId': 'Bucket',
+                'ResourceStatus': 'DELETE_FAILED',
+                'ResourceStatusReason': 'The bucket you tried to delete is not empty',
+                'EventId': 6
+            }
+        ]
+        self.assertEqual(_root_cause(events), None)
+
+    def test_cancel_update(self):
+        '''cancel an in progress update
+        '''
+        client = cfn.Cloudformation()
+        def cancel_update_stack(StackName):
+            self.assertEqual(StackName, 'foo')
+            return {}
+        client.mock('cancel_update_stack', cancel_update_stack)
+        self.assertEqual(_cancel_update(client, 'foo'), True)
+        self.assertEqual(client.called['cancel_update_stack'], 1)
+
     def test_stack_exists(self):
         '''verify a stack exists
         '''
@@ -128,6 +200,36 @@ class TestCommandDeploy(unittest.TestCase):
         _execute_changeset(client, 'foo', 'bar')
         self.assertEqual(client.called['execute_change_set'], 1)
 
+    def test_last_event_id(self):
+        '''get the most recent stack event id
+        '''
+        client = cfn.Cloudformation()
+        describe_stack_events = cfn.make_describe_stack_events(client, 3)
+        client.mock('describe_stack_events', describe_stack_events)
+        self.assertEqual(_last_event_id(client, 'foo'), 1)
+
+    def test_events_since(self):
+        '''only return events after the last seen event, oldest first
+        '''
+        client = cfn.Cloudformation()
+        def first_page(StackName, NextToken):
+            self.assertEqual(NextToken, None)
+            return {
+                'StackEvents': [{'EventId': 4}, {'EventId': 3}],
+                'NextToken': 'page2'
+            }
+        def second_page(StackName, NextToken):
+            self.assertEqual(NextToken, 'page2')
+            return {
+                'StackEvents': [{'EventId': 2}, {'EventId': 1}],
+                'NextToken': 'page3'
+            }
+        client.mock('describe_stack_events', first_page)
+        client.mock('describe_stack_events', second_page)
+        events = _events_since(client, 'foo', 2)
+        self.assertEqual(client.called['describe_stack_events'], 2)
+        self.assertEqual([event['EventId'] for event in events], [3, 4])
+
     def test_get_parameters(self):
         # Need to check rendering a template. Loading a template from disk 
         # and rendering should be separated. This is a placeholder
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from cfnctl.commands.lambda_command import compile_ignore, is_ignored, load_ignore, write_zip
+
+class TestCommandLambda(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp, 'src')
+        for path in [
+                'handler.py',
+                'handler.pyc',
+                'README.md',
+                'lib/util.py',
+                'lib/__pycache__/util.cpython-36.pyc',
+                'tests/test_handler.py',
+                '.git/HEAD',
+                'docs/index.html',
+                'pkg/docs/__init__.py',
+        ]:
+            path = os.path.join(self.source, path)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as handle:
+                handle.write('x')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def zip_names(self, rules):
+        name = os.path.join(self.tmp, 'out.zip')
+        zipf = zipfile.ZipFile(name, 'w')
+        stats = write_zip(self.source, zipf, rules)
+        zipf.close()
+        return sorted(zipfile.ZipFile(name).namelist()), stats
+
+    def test_is_ignored(self):
+        '''match paths with gitignore semantics
+        '''
+        rules = compile_ignore(['# comment', '*.log', '!keep.log', '/build/', 'docs/**/*.txt'])
+        self.assertEqual(is_ignored(rules, 'error.log'), True)
+        self.assertEqual(is_ignored(rules, 'lib/error.log'), True)
+        self.assertEqual(is_ignored(rules, 'keep.log'), False)
+        self.assertEqual(is_ignored(rules, 'build', True), True)
+        self.assertEqual(is_ignored(rules, 'build'), False)
+        self.assertEqual(is_ignored(rules, 'lib/build', True), False)
+        self.assertEqual(is_ignored(rules, 'docs/a/b/c.txt'), True)
+        self.assertEqual(is_ignored(rules, 'docs/c.txt'), True)
+        self.assertEqual(is_ignored(rules, 'docs/c.md'), False)
+
+    def test_write_zip(self):
+        '''archive everything with source relative names
+        '''
+        names, stats = self.zip_names(None)
+        self.assertEqual(len(names), 9)
+        self.assertTrue('src/handler.py' in names)
+        self.assertEqual(stats['skipped_files'], 0)
+
+    def test_write_zip_ignore(self):
+        '''prune ignored directories and skip ignored files
+        '''
+        with open(os.path.join(self.source, '.cfnctlignore'), 'w') as handle:
+            handle.write('tests/\n')
+        rules = load_ignore(os.path.join(self.source, '.cfnctlignore'), strip=True)
+        names, stats = self.zip_names(rules)
+        self.assertEqual(
+            names,
+            ['src/handler.py', 'src/lib/util.py', 'src/pkg/docs/__init__.py']
+        )
+        self.assertEqual(stats['skipped_dirs'], 4)
+        self.assertEqual(stats['skipped_files'], 3)
+        self.assertEqual(stats['skipped_bytes'], 9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import botocore.exceptions
+import cfnctl.journal as journal
+import test.mocks.cloudformation as cfn
+from cfnctl.commands.wait import _read_wait_token, _poll_stack, wait_for_tokens
+
+class TestCommandWait(unittest.TestCase):
+
+    def test_read_wait_token(self):
+        '''load a wait token from a JSON string
+        '''
+        token = _read_wait_token(json.dumps({'stack': 'foo', 'event_id': 1}))
+        self.assertEqual(token['stack'], 'foo')
+        self.assertEqual(token['event_id'], 1)
+        self.assertRaises(ValueError, _read_wait_token, '{"event_id": 1}')
+        self.assertRaises(ValueError, _read_wait_token, 'not a token')
+
+    def test_poll_stack(self):
+        '''log new events and move the token forward
+        '''
+        client = cfn.Cloudformation()
+        describe_stack_events = cfn.make_describe_stack_events(client, 3)
+        describe_stacks = cfn.make_describe_stacks(client, 1, 'UPDATE_COMPLETE')
+        client.mock('describe_stack_events', describe_stack_events)
+        client.mock('describe_stacks', describe_stacks)
+        token = {'stack': 'foo', 'event_id': 2}
+        stack_status = _poll_stack(client, token)
+        self.assertEqual(token['event_id'], 1)
+        self.assertEqual(stack_status['complete'], True)
+
+    def test_wait_for_tokens(self):
+        '''pause execution until every stack is complete
+        '''
+        clients = {}
+        for region, n_calls in [('us-east-1', 1), ('us-west-2', 3)]:
+            client = cfn.Cloudformation()
+            describe_stack_events = cfn.make_describe_stack_events(client, n_calls + 1)
+            describe_stacks = cfn.make_describe_stacks(client, n_calls, 'UPDATE_COMPLETE')
+            client.mock('describe_stack_events', describe_stack_events)
+            client.mock('describe_stacks', describe_stacks)
+            clients[region] = client
+        tokens = [
+            {'stack': 'foo', 'event_id': 2, 'region': 'us-east-1'},
+            {'stack': 'bar', 'event_id': 2, 'region': 'us-west-2'}
+        ]
+        statuses = wait_for_tokens(tokens, lambda region: clients[region])
+        self.assertEqual(statuses, {
+            ('us-east-1', 'foo'): 'UPDATE_COMPLETE',
+            ('us-west-2', 'bar'): 'UPDATE_COMPLETE'
+        })
+        self.assertEqual(clients['us-east-1'].called['describe_stacks'], 1)
+        self.assertEqual(clients['us-west-2'].called['describe_stacks'], 3)
+
+    def test_wait_for_tokens_same_stack_name(self):
+        '''keep one status per region for stacks sharing a name
+        '''
+        clients = {}
+        for region, status in [
+                ('us-east-1', 'UPDATE_ROLLBACK_COMPLETE'),
+                ('us-west-2', 'UPDATE_COMPLETE')
+        ]:
+            client = cfn.Cloudformation()
+            client.mock('describe_stack_events', cfn.make_describe_stack_events(client, 3))
+            client.mock('describe_stacks', cfn.make_describe_stacks(client, 1, status))
+            clients[region] = client
+        tokens = [
+            {'stack': 'app', 'event_id': 2, 'region': 'us-east-1'},
+            {'stack': 'app', 'event_id': 2, 'region': 'us-west-2'}
+        ]
+        statuses = wait_for_tokens(tokens, lambda region: clients[region])
+        self.assertEqual(statuses, {
+            ('us-east-1', 'app'): 'UPDATE_ROLLBACK_COMPLETE',
+            ('us-west-2', 'app'): 'UPDATE_COMPLETE'
+        })
+
+    def test_wait_for_tokens_journal(self):
+        '''journal the final status of deploys started with --no-wait
+        '''
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, 'journal.db')
+        os.environ['CFNCTL_JOURNAL'] = path
+        try:
+            client = cfn.Cloudformation()
+            client.mock('describe_stack_events', cfn.make_describe_stack_events(client, 3))
+            client.mock('describe_stacks', cfn.make_describe_stacks(client, 1, 'UPDATE_COMPLETE'))
+            tokens = [{
+                'stack': 'foo',
+                'changeset': 'foo-set',
+                'event_id': 2,
+                'region': 'us-east-1',
+                'started': time.time() - 60,
+                'account': '123456789012'
+            }]
+            wait_for_tokens(tokens, lambda region: client)
+            entries = journal.runs(path=path)
+            self.assertEqual(len(entries), 1)
+            self.assertEqual(entries[0]['status'], 'UPDATE_COMPLETE')
+            self.assertEqual(entries[0]['changeset'], 'foo-set')
+            self.assertEqual(entries[0]['account'], '123456789012')
+            self.assertTrue(entries[0]['duration'] >= 60)
+        finally:
+            del os.environ['CFNCTL_JOURNAL']
+            shutil.rmtree(tmp)
+
+    def test_wait_for_tokens_fail_fast(self):
+        '''stop waiting on a stack at its first failure and cancel the update
+        '''
+        client = cfn.Cloudformation()
+        client.mock('describe_stack_events', cfn.make_failed_stack_events(client))
+        client.mock('describe_stacks', cfn.make_describe_stacks(client, 3, 'UPDATE_COMPLETE'))
+        client.mock('cancel_update_stack', lambda StackName: {})
+        tokens = [{'stack': 'foo', 'event_id': 1}]
+        statuses = wait_for_tokens(tokens, lambda region: client, True, True)
+        self.assertEqual(statuses, {(None, 'foo'): 'UPDATE_FAILED'})
+        self.assertEqual(tokens[0]['event_id'], 4)
+        self.assertEqual(client.called['cancel_update_stack'], 1)
+
+    def test_wait_for_tokens_client_error(self):
+        '''keep waiting on other stacks when one cannot be described
+        '''
+        client = cfn.Cloudformation()
+        def describe_stack_events(StackName, NextToken):
+            raise botocore.exceptions.ClientError(
+                {'Error': {'Code': 'ValidationError', 'Message': 'Stack does not exist'}},
+                'DescribeStackEvents'
+            )
+        client.mock('describe_stack_events', describe_stack_events)
+        client.mock('describe_stack_events', cfn.make_describe_stack_events(client, 3))
+        client.mock('describe_stacks', cfn.make_describe_stacks(client, 1, 'UPDATE_COMPLETE'))
+        tokens = [{'stack': 'gone', 'event_id': 1}, {'stack': 'foo', 'event_id': 2}]
+        statuses = wait_for_tokens(tokens, lambda region: client)
+        self.assertEqual(statuses, {(None, 'gone'): 'ERROR', (None, 'foo'): 'UPDATE_COMPLETE'})
+
+if __name__ == '__main__':
+    unittest.main()
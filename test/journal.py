@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import cfnctl.journal as journal
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'nested', 'journal.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def add_run(self, name, duration, status='UPDATE_COMPLETE', region='us-east-1'):
+        journal.record('deploy', name, status, time.time() - duration,
+                       region=region, details={'a': 1}, path=self.path)
+
+    def test_record_and_runs(self):
+        '''append runs and read them back newest first
+        '''
+        self.add_run('foo', 10, 'EXECUTING')
+        self.add_run('foo', 10)
+        self.add_run('bar', 5, region='us-west-2')
+        entries = journal.runs(path=self.path)
+        self.assertEqual([entry['name'] for entry in entries], ['bar', 'foo', 'foo'])
+        self.assertEqual(entries[1]['status'], 'UPDATE_COMPLETE')
+        self.assertEqual(entries[1]['details'], '{"a": 1}')
+        self.assertEqual(len(journal.runs(name='foo', path=self.path)), 2)
+        self.assertEqual(len(journal.runs(region='us-west-2', path=self.path)), 1)
+        self.assertEqual(len(journal.runs(limit=1, path=self.path)), 1)
+
+    def test_record_failure(self):
+        '''a journal that cannot be written does not raise
+        '''
+        blocker = os.path.join(self.tmp, 'file')
+        with open(blocker, 'w') as handle:
+            handle.write('x')
+        journal.record('deploy', 'foo', 'UPDATE_COMPLETE', time.time(),
+                       path=os.path.join(blocker, 'journal.db'))
+
+    def test_regressions(self):
+        '''flag the latest run when it is much slower than earlier runs
+        '''
+        for duration in [10, 12, 11]:
+            self.add_run('foo', duration)
+            self.add_run('bar', duration)
+        self.add_run('foo', 40)
+        self.add_run('bar', 12)
+        self.add_run('bar', 90, 'EXECUTING')
+        self.add_run('baz', 10)
+        self.add_run('baz', 1, 'CHANGESET_FAILED')
+        self.add_run('baz', 2, 'UPDATE_FAILED')
+        self.add_run('baz', 12)
+        found = journal.regressions(journal.runs(path=self.path))
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0]['entry']['name'], 'foo')
+        self.assertAlmostEqual(found[0]['baseline'], 11, 0)
+
+    def test_regressions_package_seconds(self):
+        '''compare lambda runs on packaging time, not upload time
+        '''
+        for duration, package_seconds in [(10, 2), (11, 2), (60, 2), (10, 9)]:
+            journal.record('lambda', 'src', 'UPLOADED', time.time() - duration,
+                           details={'package_seconds': package_seconds}, path=self.path)
+        found = journal.regressions(journal.runs(path=self.path))
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0]['seconds'], 9)
+        self.assertEqual(found[0]['baseline'], 2)
+
+    def test_hash_file(self):
+        '''hash local files only
+        '''
+        path = os.path.join(self.tmp, 'template.yml')
+        with open(path, 'w') as handle:
+            handle.write('Resources: {}')
+        self.assertEqual(len(journal.hash_file(path)), 64)
+        self.assertEqual(journal.hash_file('https://example.com/template.yml'), None)
+
+    def test_hash_value(self):
+        '''hash values independently of key order
+        '''
+        self.assertEqual(journal.hash_value({'a': 1, 'b': 2}), journal.hash_value({'b': 2, 'a': 1}))
+        self.assertNotEqual(journal.hash_value({'a': 1}), journal.hash_value({'a': 2}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ class Cloudformation:
             'create_change_set': 0,
             'describe_change_set': 0,
             'execute_change_set': 0,
+            'cancel_update_stack': 0,
         }
 
     def mock(self, method, callback):
@@ -33,6 +34,10 @@ class Cloudformation:
         callback = self.increment_and_get_callback('execute_change_set')
         return callback(ChangeSetName, StackName)
 
+    def cancel_update_stack(self, StackName):
+        callback = self.increment_and_get_callback('cancel_update_stack')
+        return callback(StackName)
+
     def create_change_set(
         self,
         StackName,
@@ -96,6 +101,41 @@ def make_describe_stack_events(client, n_calls):
         }
     return describe_stack_events
 
+def make_failed_stack_events(client):
+    def describe_stack_events(StackName, NextToken):
+        return {
+            'StackEvents': [
+                {
+                    'LogicalResourceId': 'Queue',
+                    'ResourceStatus': 'UPDATE_FAILED',
+                    'ResourceStatusReason': 'Resource update cancelled',
+                    'StackName': StackName,
+                    'EventId': 4
+                },
+                {
+                    'LogicalResourceId': 'Bucket',
+                    'ResourceStatus': 'UPDATE_FAILED',
+                    'ResourceStatusReason': 'Bucket already exists',
+                    'StackName': StackName,
+                    'EventId': 3
+                },
+                {
+                    'LogicalResourceId': 'Queue',
+                    'ResourceStatus': 'UPDATE_IN_PROGRESS',
+                    'StackName': StackName,
+                    'EventId': 2
+                },
+                {
+                    'LogicalResourceId': StackName,
+                    'ResourceStatus': 'UPDATE_IN_PROGRESS',
+                    'ResourceStatusReason': 'User Initiated',
+                    'StackName': StackName,
+                    'EventId': 1
+                }
+            ]
+        }
+    return describe_stack_events
+
 def make_describe_change_set(client, n_calls, status='CREATE_COMPLETE'):
     def describe_change_set(StackName, NextToken):
         # mock the call again